@@ -26,7 +26,7 @@ def _parseArgs():
         "--monitor",
         #  "-m",
         action="store",
-        help="Address to listen to when publishing stats",
+        help="Address to listen to when publishing stats, needs the server extra",
     )
     parser.add_argument(
         "--print-constellation-map",
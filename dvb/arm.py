@@ -3,47 +3,140 @@
 import atexit
 import logging
 import mmap
-from multiprocessing import Lock
+import os
+import struct
+from threading import Lock
+from typing import Sequence, Tuple
 
 _logger = logging.getLogger(__name__)
 
+# mmap only exposes MAP_POPULATE from Python 3.10, 0x8000 is its value on Linux
+_MAP_POPULATE = getattr(mmap, "MAP_POPULATE", 0x8000)
+
+_U32 = struct.Struct("<I")
+
 
 class BaseMemoryRegion:
-    _fd = open("/dev/mem", "r+b")
+    _fd = None
     _lock = Lock()
 
     @staticmethod
-    @atexit.register
+    def openIoMem():
+        """
+        Opens /dev/mem on the first call only, so that importing this module
+        doesn't touch the device
+        """
+        with BaseMemoryRegion._lock:
+            if BaseMemoryRegion._fd is None:
+                _logger.info("Opening /dev/mem")
+                # O_SYNC makes the mappings uncached, which is what device
+                # registers need
+                BaseMemoryRegion._fd = open(
+                    "/dev/mem",
+                    "r+b",
+                    opener=lambda path, flags: os.open(path, flags | os.O_SYNC),
+                )
+                atexit.register(BaseMemoryRegion.closeIoMem)
+        return BaseMemoryRegion._fd
+
+    @staticmethod
     def closeIoMem():
         _logger.info("Closing /dev/mem file pointer")
         BaseMemoryRegion._fd.close()
 
-    def __init__(self, base_addr, length):
+    def __init__(self, base_addr, length, sequential=False):
+        """
+        Maps length bytes of /dev/mem at base_addr. Set sequential for bulk
+        windows such as FIFO data ports, it's pointless for register blocks
+        """
         _logger.info("Creating object for 0x%X, length is %d", base_addr, length)
         self._base_addr = base_addr
         self._length = length
-        self._mmap = mmap.mmap(
-            fileno=self._fd.fileno(), length=length, offset=base_addr
-        )
+        try:
+            # Fault the pages in up front instead of on the first access
+            self._mmap = mmap.mmap(
+                fileno=self.openIoMem().fileno(),
+                length=length,
+                offset=base_addr,
+                flags=mmap.MAP_SHARED | _MAP_POPULATE,
+            )
+        except OSError:
+            _logger.warning("Mapping with MAP_POPULATE failed, retrying without it")
+            self._mmap = mmap.mmap(
+                fileno=self.openIoMem().fileno(), length=length, offset=base_addr
+            )
+
+        if sequential:
+            try:
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+            except (AttributeError, OSError):
+                _logger.debug("Unable to set MADV_SEQUENTIAL for 0x%X", base_addr)
 
     def _write(self, addr: int, data: int):
         with self._lock:
+            self._writeUnlocked(addr, data)
+
+    def _read(self, addr: int) -> int:
+        with self._lock:
+            return self._readUnlocked(addr)
+
+    def _writeUnlocked(self, addr: int, data: int):
+        "Same as _write but expects the caller to hold self._lock"
+        if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug("W @ 0x%.8X: 0x%.8X", self._base_addr + addr, data)
+        try:
+            self._mmap[addr : addr + 4] = _U32.pack(data)
+        except:
+            _logger.error("Failed to write to 0x%.8X", addr)
+            raise
+
+    def _readUnlocked(self, addr: int) -> int:
+        "Same as _read but expects the caller to hold self._lock"
+        #  _logger.debug("R @ 0x%.8X: ?", self._base_addr + addr)
+        try:
+            data = _U32.unpack(self._mmap[addr : addr + 4])[0]
+        except:
+            _logger.error("Failed to read from 0x%.8X", addr)
+            raise
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("R @ 0x%.8X: 0x%.8X", self._base_addr + addr, data)
+        return data
+
+    def _writeBlock(self, addr: int, words: Sequence[int]):
+        "Writes words to consecutive registers starting at addr"
+        data = struct.pack(f"<{len(words)}I", *words)
+        with self._lock:
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug(
+                    "W @ 0x%.8X: %d words", self._base_addr + addr, len(words)
+                )
             try:
-                self._mmap.seek(addr)
-                self._mmap.write(data.to_bytes(4, "little"))
+                self._mmap[addr : addr + len(data)] = data
             except:
                 _logger.error("Failed to write to 0x%.8X", addr)
                 raise
 
-    def _read(self, addr: int) -> int:
+    def _readBlock(self, addr: int, count: int) -> Tuple[int, ...]:
+        "Reads count consecutive registers starting at addr"
         with self._lock:
-            #  _logger.debug("R @ 0x%.8X: ?", self._base_addr + addr)
             try:
-                self._mmap.seek(addr)
-                data = int.from_bytes(self._mmap.read(4), "little")
+                data = self._mmap[addr : addr + 4 * count]
             except:
                 _logger.error("Failed to read from 0x%.8X", addr)
                 raise
-            _logger.debug("R @ 0x%.8X: 0x%.8X", self._base_addr + addr, data)
-            return data
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("R @ 0x%.8X: %d words", self._base_addr + addr, count)
+        return struct.unpack(f"<{count}I", data)
+
+    def _writeFifo(self, addr: int, data: bytes):
+        "Pushes data into a FIFO register, one 4-byte beat at a time"
+        with self._lock:
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug("W @ 0x%.8X: %d bytes", self._base_addr + addr, len(data))
+            mm = self._mmap
+            try:
+                for offset in range(0, len(data), 4):
+                    mm[addr : addr + 4] = data[offset : offset + 4]
+            except:
+                _logger.error("Failed to write to 0x%.8X", addr)
+                raise
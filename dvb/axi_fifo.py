@@ -2,7 +2,9 @@
 # pylint: disable=missing-docstring
 import logging
 
-from common import BaseMemoryRegion
+import numpy as np
+
+from dvb.common import BaseMemoryRegion
 
 ISR = 0x0  # Read/Clear on Write(1)Interrupt Enable Register (IER))
 IER = 0x4  # Read/WriteTransmit Data FIFO Reset (TDFR)
@@ -24,10 +26,33 @@ RX_ID_REGISTER = 0x3C  # Receive ID register
 RX_USER_REGISTER = 0x40  # Receive USER register
 
 
+def _swapWords(data: bytes) -> bytes:
+    """
+    Byte swaps every 32-bit word of data so that it can be pushed into the TX
+    FIFO as is. A trailing partial word is zero padded on its MSB side, same as
+    int.from_bytes(word, "big") would do.
+    """
+    tail = len(data) % 4
+    if tail:
+        data = data[:-tail] + bytes(4 - tail) + data[-tail:]
+    return np.frombuffer(data, dtype=">u4").astype("<u4").tobytes()
+
+
+def _unswapWords(words: np.ndarray) -> bytes:
+    """
+    Converts words read from the RX FIFO into the byte stream they carry. Each
+    16-bit half of a word is byte swapped, i.e. 0xAABBCCDD becomes the bytes
+    BB AA DD CC
+    """
+    return words.astype(">u4").view(">u2").astype("<u2").tobytes()
+
+
 class AxiFifo(BaseMemoryRegion):
     count = 0
 
     def __init__(self, *args, **kwargs):
+        # Data goes through the FIFO ports in bursts
+        kwargs.setdefault("sequential", True)
         super().__init__(*args, **kwargs)
         self._logger = logging.getLogger(f"axi_fifo_{self.count}")
         AxiFifo.count += 1
@@ -58,9 +83,7 @@ class AxiFifo(BaseMemoryRegion):
         self._write(TX_DEST_REGISTER, 0)
         self._write(TX_ID_REGISTER, tid)
         self._write(TX_USER_REGISTER, tid)
-        for i in range(words):
-            word = data[4 * i : 4 * i + 4]
-            self._write(TX_FIFO_DATA, int.from_bytes(word, "big"))
+        self._writeFifo(TX_FIFO_DATA, _swapWords(data))
 
         self._logger.info("Tx FIFO vac: %d", self._read(TX_FIFO_VACANCY))
         self._writeTxLength(len(data))
@@ -73,14 +96,16 @@ class AxiFifo(BaseMemoryRegion):
     def receive(self, entries=None):
         entries = entries or self.getRxOccupation()
         self._logger.info("Reading %d entries", entries)
-        result = b""
-        for i in range(entries):
-            word = f"{self._read(RX_FIFO_DATA):08X}"
-            word = word[2:4] + word[0:2] + word[6:8] + word[4:6]
-            self._logger.debug("%3d | 0x%s", i, word)
-            result += bytes.fromhex(word)
+        words = np.empty(entries, dtype=">u4")
+        debug = self._logger.isEnabledFor(logging.DEBUG)
+        read, logger, rx_fifo_data = self._readUnlocked, self._logger, RX_FIFO_DATA
+        with self._lock:
+            for i in range(entries):
+                words[i] = read(rx_fifo_data)
+                if debug:
+                    logger.debug("%3d | 0x%.8X", i, words[i])
 
-        return result
+        return _unswapWords(words)
 
     def _receiveCutThrough(self):
         self._write(IER, 0x04100000)
@@ -95,8 +120,13 @@ class AxiFifo(BaseMemoryRegion):
 
         self._logger.info("Destination: 0x%.8X", dest)
         self._logger.info("ID: 0x%.8X", self._read(RX_ID_REGISTER))
-        for i in range(entries):
-            self._logger.info("%2d: 0x%.8X", i, self._read(RX_FIFO_DATA))
+        info = self._logger.isEnabledFor(logging.INFO)
+        read, logger, rx_fifo_data = self._readUnlocked, self._logger, RX_FIFO_DATA
+        with self._lock:
+            for i in range(entries):
+                data = read(rx_fifo_data)
+                if info:
+                    logger.info("%2d: 0x%.8X", i, data)
 
         #  self._logger.info("RX FIFO occupancy: %d", self.getRxOccupation())
 
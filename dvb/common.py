@@ -5,24 +5,28 @@ import os
 import platform
 import subprocess as subp
 from enum import Enum
+from itertools import zip_longest
 
 _logger = logging.getLogger(__name__)
 IS_ARM = "armv7l" in os.uname()
 IS_ODYSSEY = platform.node() == "odyssey"
 
 if IS_ARM:
+    # Map /dev/mem directly unless peek/poke are explicitly requested, spawning
+    # a process for every access is orders of magnitude slower
     if os.environ.get("FORCE_PEEKPOKE", None) is not None:
-        from dvb.arm import BaseMemoryRegion
-    else:
         from dvb.peek_poke import BaseMemoryRegion
+    else:
+        from dvb.arm import BaseMemoryRegion  # type: ignore[assignment]
 elif IS_ODYSSEY:
-    from dvb.xdma import BaseMemoryRegion
+    from dvb.xdma import BaseMemoryRegion  # type: ignore[assignment]
 else:
-    from dvb.fake_access import BaseMemoryRegion
+    from dvb.fake_access import BaseMemoryRegion  # type: ignore[assignment]
 
 
 def run(cmd):
-    _logger.debug("$ %s", " ".join(map(str, cmd)))
+    if _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug("$ %s", " ".join(map(str, cmd)))
     try:
         return subp.check_output(cmd)
     except subp.SubprocessError:
@@ -31,19 +35,11 @@ def run(cmd):
 
 
 def tabulate(table):
-    widths = {}
-    for line in table:
-        for i, row in enumerate(line):
-            widths[i] = max(widths.get(i, 0), len(str(row)))
-
-    result = []
-    for line in table:
-        current_line = []
-        for i, row in enumerate(line):
-            current_line.append(str(row).ljust(widths[i]))
-        result.append(current_line)
-
-    return result
+    table = [[str(cell) for cell in line] for line in table]
+    # Lines may have different number of cells, pad them so that each column
+    # width takes every line into account
+    widths = [max(map(len, column)) for column in zip_longest(*table, fillvalue="")]
+    return [[cell.ljust(width) for cell, width in zip(line, widths)] for line in table]
 
 
 class ConstellationType(Enum):
@@ -199,4 +195,13 @@ TID_MAP = {
         },
     },
 }
+
+# Same as TID_MAP but indexed by a (frame type, constellation, code rate) tuple
+TID_MAP_FLAT = {
+    (frame_type, constellation, code_rate): tid
+    for frame_type, constellations in TID_MAP.items()
+    for constellation, code_rates in constellations.items()
+    for code_rate, tid in code_rates.items()
+}
+
 __all__ = ["tabulate", "BaseMemoryRegion", "ConstellationType"]
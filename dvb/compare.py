@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 
-import struct
 import sys
-from typing import Any, Tuple
+from typing import Tuple
 
 import numpy as np
 
+from dvb.samples import MAX_REPORTS, Buffer, mapFile, scan
+
 
 def _compare(
-    actual: Tuple[int, ...], expected: Tuple[int, ...], tolerance: int
+    actual: np.ndarray, expected: np.ndarray, tolerance: int
 ) -> Tuple[bool, float]:
     print("#######################")
     if len(actual) != len(expected):
@@ -18,64 +19,48 @@ def _compare(
     print(
         "Input lengths were %d and %d, using %d" % (len(actual), len(expected), length)
     )
+    actual_words = np.asarray(actual[:length], dtype=np.int32)
+    expected_words = np.asarray(expected[:length], dtype=np.int32)
+
+    # Pearson correlation coefficient, same as np.corrcoef()[0][1] without
+    # building the stacked input and the full covariance matrix
     correlation = 0.0
     if length:
-        correlation_matrix = np.corrcoef(actual[:length], expected[:length])
-        correlation = min(correlation_matrix[0][1], correlation_matrix[1][0])
+        actual_delta = actual_words - actual_words.mean()
+        expected_delta = expected_words - expected_words.mean()
+        denominator = np.sqrt(
+            np.dot(actual_delta, actual_delta) * np.dot(expected_delta, expected_delta)
+        )
+        if denominator:
+            correlation = float(np.dot(actual_delta, expected_delta) / denominator)
     print("Data correlation is %s" % correlation)
 
-    errors = 0
-    passed = True
-    max_delta = 0
-    for i, expected_word in enumerate(expected[:length]):
-        try:
-            actual_word = actual[i]
-        except IndexError:
-            print("Can't compare data, index %d was not found" % i)
-            passed = False
-            break
-
-        lower_threshold = expected_word - tolerance
-        upper_threshold = expected_word + tolerance
-
-        report = True
-        fmt = "%4d/%d || Got %6d (0x%.4X, % .8f), expected %6d (0x%.4X, % .8f) || Thresholds: [%6d, %6d] || delta = %d"
-        max_delta = max(max_delta, abs(expected_word - actual_word))
-        if lower_threshold <= actual_word <= upper_threshold:
-            fmt = "[OK]  " + fmt
-            report = False
-        else:
-            fmt = "[NOK] " + fmt
-            errors += 1
-            report = True
-
-        if passed:  # and report:
-            actual_bin = actual_word
-            if actual_bin < 0:
-                actual_bin += 1 << 16
-            expected_bin = expected_word
-            if expected_bin < 0:
-                expected_bin += 1 << 16
-            print(
-                fmt
-                % (
-                    i / 2,
-                    i % 2,
-                    actual_word,
-                    actual_bin,
-                    actual_word / (1 << 15),
-                    expected_word,
-                    expected_bin,
-                    expected_word / (1 << 15),
-                    lower_threshold,
-                    upper_threshold,
-                    expected_word - actual_word,
-                )
+    errors, max_delta, first_errors, _ = scan(
+        actual_words, expected_words, tolerance, MAX_REPORTS
+    )
+    passed = errors < MAX_REPORTS
+
+    # Only report the first mismatches, the rest is summarised below
+    fmt = "[NOK] %4d/%d || Got %6d (0x%.4X, % .8f), expected %6d (0x%.4X, % .8f) || Thresholds: [%6d, %6d] || delta = %d"
+    for i in first_errors:
+        actual_word = int(actual_words[i])
+        expected_word = int(expected_words[i])
+        print(
+            fmt
+            % (
+                i // 2,
+                i % 2,
+                actual_word,
+                actual_word & 0xFFFF,
+                actual_word / (1 << 15),
+                expected_word,
+                expected_word & 0xFFFF,
+                expected_word / (1 << 15),
+                expected_word - tolerance,
+                expected_word + tolerance,
+                expected_word - actual_word,
             )
-
-        if errors >= 10:
-            passed = False
-            #  break
+        )
 
     print(
         f"Errors: {errors:d} / {len(expected)}",
@@ -87,9 +72,9 @@ def _compare(
     return passed, correlation
 
 
-def _toListOfInt(data: bytes) -> Tuple[Any, ...]:
+def _toListOfInt(data: Buffer) -> np.ndarray:
     print("Data length is %d bytes" % len(data))
-    return struct.unpack("<" + "h" * (len(data) // 2), data)
+    return np.frombuffer(data, dtype="<i2")
 
 
 def main():
@@ -97,9 +82,7 @@ def main():
     filename_actual = sys.argv[1]
     filename_expected = sys.argv[2]
 
-    with open(filename_actual, "rb") as fd:
-        actual = _toListOfInt(fd.read())
-    with open(filename_expected, "rb") as fd:
-        expected = _toListOfInt(fd.read())
+    actual = _toListOfInt(mapFile(filename_actual))
+    expected = _toListOfInt(mapFile(filename_expected))
 
     sys.stderr.write(f"{filename_expected}, {_compare(actual, expected, 64)}\n")
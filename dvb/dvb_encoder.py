@@ -5,6 +5,11 @@
 import logging
 import math
 from collections import namedtuple
+from contextlib import contextmanager
+from itertools import product, zip_longest
+from typing import List
+
+import numpy as np
 
 from dvb.common import (
     BaseMemoryRegion,
@@ -17,6 +22,94 @@ from dvb.common import (
 AxiInterface = namedtuple("AxiInterface", ("slave", "master"))
 Strobes = namedtuple("Strobes", ("tvalid", "tready"))
 FrameLengths = namedtuple("FrameLengths", ("max", "min"))
+AxiSnapshot = namedtuple(
+    "AxiSnapshot",
+    (
+        "strobes",
+        "frame_count",
+        "last_frame_length",
+        "word_count",
+        "max_frame_length",
+        "min_frame_length",
+    ),
+)
+
+_MASK16 = 0xFFFF
+# Bit fields of the DvbEncoder config register (0x0)
+_PLSCR_MASK = 0x3FFFF
+_DUMMY_FRAMES_SHIFT = 18
+_DUMMY_FRAMES_MASK = 1 << _DUMMY_FRAMES_SHIFT
+
+# Only the lower 4 bits of the strobes register are used, so decode every value
+# once instead of creating new tuples on every read
+_STROBES = tuple(
+    AxiInterface(
+        slave=Strobes(tvalid=value & 1, tready=(value >> 1) & 1),
+        master=Strobes(tvalid=(value >> 2) & 1, tready=(value >> 3) & 1),
+    )
+    for value in range(16)
+)
+
+# Names of the DvbEncoder attributes holding the AXI debug waypoints, in
+# pipeline order
+_WAYPOINT_NAMES = (
+    "input_width_converter",
+    "bb_scrambler",
+    "bch_encoder",
+    "ldpc_encoder",
+    "bit_interleaver",
+    "plframe",
+    "output",
+)
+
+# Header of the AXI debug table printed by DvbEncoder.printStatus
+_DEBUG_HEADER = (
+    "Waypoint",
+    "AXI slave",
+    "AXI master",
+    "Frames",
+    "Words",
+    "Last frame length",
+    "Max frame length",
+    "Min frame length",
+)
+
+# Polyphase filter coefficients, written from register 0x3CC onwards
+_POLYPHASE_COEFFS = (
+    -0.000728216778953,
+    0.00181682675611,
+    -0.00029152361094,
+    -0.00169956660829,
+    0.00198084092699,
+    0.000321642903145,
+    -0.00423926254734,
+    0.00304758665152,
+    0.00683168089017,
+    -0.00947270914912,
+    -0.00942199118435,
+    0.0211963132024,
+    0.0116332434118,
+    -0.0461302995682,
+    -0.0131214763969,
+    0.156597167253,
+    0.263359487057,
+    0.156597167253,
+    -0.0131214763969,
+    -0.0461302995682,
+    0.0116332434118,
+    0.0211963132024,
+    -0.00942199118435,
+    -0.00947270914912,
+    0.00683168089017,
+    0.00304758665152,
+    -0.00423926254734,
+    0.000321642903145,
+    0.00198084092699,
+    -0.00169956660829,
+    -0.00029152361094,
+    0.00181682675611,
+    -0.000728216778953,
+)
 
 
 def toFixedPoint(value, width):
@@ -26,11 +119,121 @@ def toFixedPoint(value, width):
     return value + (1 << width)
 
 
-def _getModulationTable(
+def _toFixedPointArray(values, width) -> np.ndarray:
+    "Same as toFixedPoint but converts a whole array at once"
+    values = np.rint(((1 << width - 1) - 1) * np.asarray(values, dtype=np.float64))
+    return values.astype(np.int64) & ((1 << width) - 1)
+
+
+def _packBitMapperRam(table):
+    """
+    Converts a modulation table into bit mapper RAM words, cos goes on the upper
+    16 bits and sin on the lower 16 bits
+    """
+    if not table:
+        return ()
+    regs = _toFixedPointArray(table, 16)
+    return tuple(((regs[:, 0] << 16) | regs[:, 1]).tolist())
+
+
+def _packPolyphaseFilter(coeffs):
+    "Converts filter coefficients into register words, same value on both halves"
+    regs = _toFixedPointArray(coeffs, 16)
+    return tuple(((regs << 16) | regs).tolist())
+
+
+_POLYPHASE_REGS = _packPolyphaseFilter(_POLYPHASE_COEFFS)
+
+
+# Constellation points in bit mapper RAM order as (ring, angle) pairs, where
+# ring indexes the radii of each config from the innermost ring outwards
+_QPSK_POINTS = (
+    (0, math.pi / 4.0),
+    (0, 7 * math.pi / 4.0),
+    (0, 3 * math.pi / 4.0),
+    (0, 5 * math.pi / 4.0),
+)
+
+_8PSK_POINTS = (
+    (0, math.pi / 4.0),
+    (0, 0.0),
+    (0, 4 * math.pi / 4.0),
+    (0, 5 * math.pi / 4.0),
+    (0, 2 * math.pi / 4.0),
+    (0, 7 * math.pi / 4.0),
+    (0, 3 * math.pi / 4.0),
+    (0, 6 * math.pi / 4.0),
+)
+
+_16APSK_POINTS = (
+    (1, math.pi / 4.0),
+    (1, -math.pi / 4.0),
+    (1, 3 * math.pi / 4.0),
+    (1, -3 * math.pi / 4.0),
+    (1, math.pi / 12.0),
+    (1, -math.pi / 12.0),
+    (1, 11 * math.pi / 12.0),
+    (1, -11 * math.pi / 12.0),
+    (1, 5 * math.pi / 12.0),
+    (1, -5 * math.pi / 12.0),
+    (1, 7 * math.pi / 12.0),
+    (1, -7 * math.pi / 12.0),
+    (0, math.pi / 4.0),
+    (0, -math.pi / 4.0),
+    (0, 3 * math.pi / 4.0),
+    (0, -3 * math.pi / 4.0),
+)
+
+_32APSK_POINTS = (
+    (1, math.pi / 4.0),
+    (1, 5 * math.pi / 12.0),
+    (1, -math.pi / 4.0),
+    (1, -5 * math.pi / 12.0),
+    (1, 3 * math.pi / 4.0),
+    (1, 7 * math.pi / 12.0),
+    (1, -3 * math.pi / 4.0),
+    (1, -7 * math.pi / 12.0),
+    (2, math.pi / 8.0),
+    (2, 3 * math.pi / 8.0),
+    (2, -math.pi / 4.0),
+    (2, -math.pi / 2.0),
+    (2, 3 * math.pi / 4.0),
+    (2, math.pi / 2.0),
+    (2, -7 * math.pi / 8.0),
+    (2, -5 * math.pi / 8.0),
+    (1, math.pi / 12.0),
+    (0, math.pi / 4.0),
+    (1, -math.pi / 12.0),
+    (0, -math.pi / 4.0),
+    (1, 11 * math.pi / 12.0),
+    (0, 3 * math.pi / 4.0),
+    (1, -11 * math.pi / 12.0),
+    (0, -3 * math.pi / 4.0),
+    (2, 0.0),
+    (2, math.pi / 4.0),
+    (2, -math.pi / 8.0),
+    (2, -3 * math.pi / 8.0),
+    (2, 7 * math.pi / 8.0),
+    (2, 5 * math.pi / 8.0),
+    (2, math.pi),
+    (2, -3 * math.pi / 4.0),
+)
+
+
+def _toCartesian(points, radii):
+    "Converts (ring, angle) constellation points into (x, y) coordinates"
+    rings, angles = np.array(points).T
+    radius = np.asarray(radii, dtype=np.float64)[rings.astype(np.intp)]
+    return tuple(
+        zip((radius * np.cos(angles)).tolist(), (radius * np.sin(angles)).tolist())
+    )
+
+
+def _buildModulationTable(
     frame_type: FrameType, constellation: ConstellationType, code_rate: CodeRate
 ):
     """
-    Returns the modulation table for a given config. Please note we're scaling the
+    Builds the modulation table for a given config. Please note we're scaling the
     import math
     constellation radius according to the old implementation of GNU Radio.  Once the CI's
     GNU Radio version is updated to include
@@ -38,25 +241,10 @@ def _getModulationTable(
     """
     # pylint: disable=invalid-name
     if constellation == ConstellationType.MOD_QPSK:
-        return (
-            # QPSK
-            (math.cos(math.pi / 4.0), math.sin(math.pi / 4.0)),
-            (math.cos(7 * math.pi / 4.0), math.sin(7 * math.pi / 4.0)),
-            (math.cos(3 * math.pi / 4.0), math.sin(3 * math.pi / 4.0)),
-            (math.cos(5 * math.pi / 4.0), math.sin(5 * math.pi / 4.0)),
-        )
+        return _toCartesian(_QPSK_POINTS, (1.0,))
 
     if constellation == ConstellationType.MOD_8PSK:
-        return (
-            (math.cos(math.pi / 4.0), math.sin(math.pi / 4.0)),
-            (math.cos(0.0), math.sin(0.0)),
-            (math.cos(4 * math.pi / 4.0), math.sin(4 * math.pi / 4.0)),
-            (math.cos(5 * math.pi / 4.0), math.sin(5 * math.pi / 4.0)),
-            (math.cos(2 * math.pi / 4.0), math.sin(2 * math.pi / 4.0)),
-            (math.cos(7 * math.pi / 4.0), math.sin(7 * math.pi / 4.0)),
-            (math.cos(3 * math.pi / 4.0), math.sin(3 * math.pi / 4.0)),
-            (math.cos(6 * math.pi / 4.0), math.sin(6 * math.pi / 4.0)),
-        )
+        return _toCartesian(_8PSK_POINTS, (1.0,))
 
     if constellation == ConstellationType.MOD_16APSK:
         r1 = 1.0
@@ -87,24 +275,7 @@ def _getModulationTable(
         #  r1 = r0 * r1
         #  r2 = r0 * r2
 
-        return (
-            (r2 * math.cos(math.pi / 4.0), r2 * math.sin(math.pi / 4.0)),
-            (r2 * math.cos(-math.pi / 4.0), r2 * math.sin(-math.pi / 4.0)),
-            (r2 * math.cos(3 * math.pi / 4.0), r2 * math.sin(3 * math.pi / 4.0)),
-            (r2 * math.cos(-3 * math.pi / 4.0), r2 * math.sin(-3 * math.pi / 4.0)),
-            (r2 * math.cos(math.pi / 12.0), r2 * math.sin(math.pi / 12.0)),
-            (r2 * math.cos(-math.pi / 12.0), r2 * math.sin(-math.pi / 12.0)),
-            (r2 * math.cos(11 * math.pi / 12.0), r2 * math.sin(11 * math.pi / 12.0)),
-            (r2 * math.cos(-11 * math.pi / 12.0), r2 * math.sin(-11 * math.pi / 12.0)),
-            (r2 * math.cos(5 * math.pi / 12.0), r2 * math.sin(5 * math.pi / 12.0)),
-            (r2 * math.cos(-5 * math.pi / 12.0), r2 * math.sin(-5 * math.pi / 12.0)),
-            (r2 * math.cos(7 * math.pi / 12.0), r2 * math.sin(7 * math.pi / 12.0)),
-            (r2 * math.cos(-7 * math.pi / 12.0), r2 * math.sin(-7 * math.pi / 12.0)),
-            (r1 * math.cos(math.pi / 4.0), r1 * math.sin(math.pi / 4.0)),
-            (r1 * math.cos(-math.pi / 4.0), r1 * math.sin(-math.pi / 4.0)),
-            (r1 * math.cos(3 * math.pi / 4.0), r1 * math.sin(3 * math.pi / 4.0)),
-            (r1 * math.cos(-3 * math.pi / 4.0), r1 * math.sin(-3 * math.pi / 4.0)),
-        )
+        return _toCartesian(_16APSK_POINTS, (r1, r2))
 
     if constellation == ConstellationType.MOD_32APSK:
         r1 = 1.0
@@ -132,67 +303,142 @@ def _getModulationTable(
         #  r1 *= r0
         #  r2 *= r0
         #  r3 *= r0
-        return (
-            (r2 * math.cos(math.pi / 4.0), r2 * math.sin(math.pi / 4.0)),
-            (r2 * math.cos(5 * math.pi / 12.0), r2 * math.sin(5 * math.pi / 12.0)),
-            (r2 * math.cos(-math.pi / 4.0), r2 * math.sin(-math.pi / 4.0)),
-            (
-                r2 * math.cos(-5 * math.pi / 12.0),
-                r2 * math.sin(-5 * math.pi / 12.0),
-            ),
-            (r2 * math.cos(3 * math.pi / 4.0), r2 * math.sin(3 * math.pi / 4.0)),
-            (r2 * math.cos(7 * math.pi / 12.0), r2 * math.sin(7 * math.pi / 12.0)),
-            (r2 * math.cos(-3 * math.pi / 4.0), r2 * math.sin(-3 * math.pi / 4.0)),
-            (
-                r2 * math.cos(-7 * math.pi / 12.0),
-                r2 * math.sin(-7 * math.pi / 12.0),
-            ),
-            (r3 * math.cos(math.pi / 8.0), r3 * math.sin(math.pi / 8.0)),
-            (r3 * math.cos(3 * math.pi / 8.0), r3 * math.sin(3 * math.pi / 8.0)),
-            (r3 * math.cos(-math.pi / 4.0), r3 * math.sin(-math.pi / 4.0)),
-            (r3 * math.cos(-math.pi / 2.0), r3 * math.sin(-math.pi / 2.0)),
-            (r3 * math.cos(3 * math.pi / 4.0), r3 * math.sin(3 * math.pi / 4.0)),
-            (r3 * math.cos(math.pi / 2.0), r3 * math.sin(math.pi / 2.0)),
-            (r3 * math.cos(-7 * math.pi / 8.0), r3 * math.sin(-7 * math.pi / 8.0)),
-            (r3 * math.cos(-5 * math.pi / 8.0), r3 * math.sin(-5 * math.pi / 8.0)),
-            (r2 * math.cos(math.pi / 12.0), r2 * math.sin(math.pi / 12.0)),
-            (r1 * math.cos(math.pi / 4.0), r1 * math.sin(math.pi / 4.0)),
-            (r2 * math.cos(-math.pi / 12.0), r2 * math.sin(-math.pi / 12.0)),
-            (r1 * math.cos(-math.pi / 4.0), r1 * math.sin(-math.pi / 4.0)),
-            (
-                r2 * math.cos(11 * math.pi / 12.0),
-                r2 * math.sin(11 * math.pi / 12.0),
-            ),
-            (r1 * math.cos(3 * math.pi / 4.0), r1 * math.sin(3 * math.pi / 4.0)),
-            (
-                r2 * math.cos(-11 * math.pi / 12.0),
-                r2 * math.sin(-11 * math.pi / 12.0),
-            ),
-            (r1 * math.cos(-3 * math.pi / 4.0), r1 * math.sin(-3 * math.pi / 4.0)),
-            (r3 * math.cos(0.0), r3 * math.sin(0.0)),
-            (r3 * math.cos(math.pi / 4.0), r3 * math.sin(math.pi / 4.0)),
-            (r3 * math.cos(-math.pi / 8.0), r3 * math.sin(-math.pi / 8.0)),
-            (r3 * math.cos(-3 * math.pi / 8.0), r3 * math.sin(-3 * math.pi / 8.0)),
-            (r3 * math.cos(7 * math.pi / 8.0), r3 * math.sin(7 * math.pi / 8.0)),
-            (r3 * math.cos(5 * math.pi / 8.0), r3 * math.sin(5 * math.pi / 8.0)),
-            (r3 * math.cos(math.pi), r3 * math.sin(math.pi)),
-            (r3 * math.cos(-3 * math.pi / 4.0), r3 * math.sin(-3 * math.pi / 4.0)),
-        )
+        return _toCartesian(_32APSK_POINTS, (r1, r2, r3))
 
     # pylint: enable=invalid-name
 
     return ()
 
 
-class AxiDebug:
-    def __init__(self, write, read):
-        self._write = write
-        self._read = read
+def _buildModulationTables():
+    """
+    Builds the modulation table and bit mapper RAM words of every config. QPSK
+    and 8PSK don't depend on frame type or code rate (and some APSK configs end
+    up with the same points), so identical tables are converted only once and
+    shared between configs
+    """
+    tables = {}
+    regs = {}
+    packed = {}
+    for config in product(FrameType, ConstellationType, CodeRate):
+        table = _buildModulationTable(*config)
+        if table not in packed:
+            packed[table] = (table, _packBitMapperRam(table))
+        tables[config], regs[config] = packed[table]
+    return tables, regs
+
+
+# Tables only depend on the config, so build all of them once
+_MOD_TABLES, _MOD_REGS = _buildModulationTables()
+
+
+def _getModulationTable(
+    frame_type: FrameType, constellation: ConstellationType, code_rate: CodeRate
+):
+    "Returns the modulation table for a given config"
+    return _MOD_TABLES.get((frame_type, constellation, code_rate), ())
+
+
+# Offset (in words) of each constellation within the bit mapper RAM
+_MOD_BASE_ADDR = {
+    ConstellationType.MOD_QPSK: 0,
+    ConstellationType.MOD_8PSK: 4,
+    ConstellationType.MOD_16APSK: 12,
+    ConstellationType.MOD_32APSK: 28,
+}
+
+# Bit mapper RAM layout as (name, first entry, number of entries), in the order
+# constellations are printed
+_CONSTELLATION_SLOTS = tuple(
+    (constellation.value, _MOD_BASE_ADDR[constellation], len(points))
+    for constellation, points in (
+        (ConstellationType.MOD_QPSK, _QPSK_POINTS),
+        (ConstellationType.MOD_8PSK, _8PSK_POINTS),
+        (ConstellationType.MOD_16APSK, _16APSK_POINTS),
+        (ConstellationType.MOD_32APSK, _32APSK_POINTS),
+    )
+)
+_BIT_MAPPER_RAM_SIZE = max(
+    base_addr + size for _, base_addr, size in _CONSTELLATION_SLOTS
+)
+
+_BIT_MAPPER_RAM_BASE_ADDR = 0x0C
+
+# Register address and words to write for each config
+_BIT_MAPPER_REGS = {
+    config: (_BIT_MAPPER_RAM_BASE_ADDR + 4 * _MOD_BASE_ADDR[config[1]], regs)
+    for config, regs in _MOD_REGS.items()
+    if config[1] in _MOD_BASE_ADDR
+}
+
+
+class _ShadowRegisters:
+    """
+    Keeps a copy of the last value written to read-modify-write registers, so
+    that a bit field update reads its register only once and then only writes
+    it. This assumes nothing else writes those registers: anything that may
+    change them, e.g. a hardware reset, must be followed by _resetShadow().
+    DvbEncoder.init() does that for the encoder and its waypoints.
+    """
+
+    def _resetShadow(self):
+        "Drops the shadow copies, each register is read again on its next update"
+        self._shadow = {}
+        self._deferred = None
+
+    def _updateBits(self, addr, mask, value):
+        "Sets the bits of the register at addr selected by mask to value"
+        if addr in self._shadow:
+            current = self._shadow[addr]
+        else:
+            current = self._read(addr)
+        current = current & ~mask | value & mask
+        self._shadow[addr] = current
+        if self._deferred is None:
+            self._write(addr, current)
+        else:
+            self._deferred.add(addr)
+
+    @contextmanager
+    def batchedWrites(self):
+        """
+        Defers bit field updates until the context exits so that changing
+        multiple fields of the same register writes it only once. If the
+        context raises nothing is written and the shadow copies are dropped
+        """
+        if self._deferred is not None:
+            yield
+            return
+        self._deferred = set()
+        try:
+            yield
+        except BaseException:
+            self._resetShadow()
+            raise
+        deferred, self._deferred = self._deferred, None
+        for addr in sorted(deferred):
+            self._write(addr, self._shadow[addr])
+
+
+class AxiDebug(_ShadowRegisters):
+    def __init__(self, region, offset):
+        self._region = region
+        self._offset = offset
+        self._resetShadow()
         self.word_count = 0
         self.max_frame_length = None
         self.min_frame_length = None
         self._logger = logging.getLogger("AxiDebug")
 
+    def _write(self, addr, data):
+        self._region._write(self._offset + addr, data)
+
+    def _read(self, addr):
+        return self._region._read(self._offset + addr)
+
+    def _readBlock(self, addr, count):
+        return self._region._readBlock(self._offset + addr, count)
+
     def update(self):
         self.word_count = self.getWordCount()
         lengths = self.getFrameLengths()
@@ -209,6 +455,24 @@ class AxiDebug:
         #  else:
         #      self.min_frame_length = min(self.min_frame_length, lengths.min)
 
+    def snapshot(self):
+        "Reads all status registers in one go"
+        frame_count, last_frame_length, lengths, word_count, strobes = self._readBlock(
+            0x4, 5
+        )
+        result = AxiSnapshot(
+            _STROBES[strobes & 0xF],
+            frame_count,
+            last_frame_length,
+            word_count,
+            lengths >> 16,
+            lengths & _MASK16,
+        )
+        self.word_count = word_count
+        self.max_frame_length = result.max_frame_length
+        self.min_frame_length = result.min_frame_length
+        return result
+
     def clear(self):
         self.word_count = 0
         self.max_frame_length = None
@@ -220,8 +484,7 @@ class AxiDebug:
 
     @block_data.setter
     def block_data(self, value):
-        current = self._read(0)
-        self._write(0, current & ~1 | value & 1)
+        self._updateBits(0, 1, value)
 
     @property
     def allow_word(self):
@@ -229,8 +492,7 @@ class AxiDebug:
 
     @allow_word.setter
     def allow_word(self, value):
-        current = self._read(0)
-        self._write(0, current & ~2 | (value & 1) << 1)
+        self._updateBits(0, 2, value << 1)
 
     @property
     def allow_frame(self):
@@ -238,8 +500,17 @@ class AxiDebug:
 
     @allow_frame.setter
     def allow_frame(self, value):
-        current = self._read(0)
-        self._write(0, current & ~4 | (value & 1) << 2)
+        self._updateBits(0, 4, value << 2)
+
+    def configure(self, block_data=None, allow_word=None, allow_frame=None):
+        "Updates the given control fields with a single register write"
+        with self.batchedWrites():
+            if block_data is not None:
+                self.block_data = block_data
+            if allow_word is not None:
+                self.allow_word = allow_word
+            if allow_frame is not None:
+                self.allow_frame = allow_frame
 
     def getFrameCount(self):
         return self._read(0x4)
@@ -248,104 +519,35 @@ class AxiDebug:
         return self._read(0x8)
 
     def getFrameLengths(self):
+        # Registers are 32 bits wide, so the upper half needs no masking
         value = self._read(0xC)
-        return FrameLengths(
-            max=(value >> 16) & ((1 << 16) - 1), min=value & ((1 << 16) - 1)
-        )
+        return FrameLengths(value >> 16, value & _MASK16)
 
     def getWordCount(self):
         return self._read(0x10)
 
     def getStrobes(self):
-        strobes = self._read(0x14)
-        s_tvalid = strobes & 1
-        s_tready = (strobes >> 1) & 1
-        m_tvalid = (strobes >> 2) & 1
-        m_tready = (strobes >> 3) & 1
-        return AxiInterface(
-            slave=Strobes(tvalid=s_tvalid, tready=s_tready),
-            master=Strobes(tvalid=m_tvalid, tready=m_tready),
-        )
+        return _STROBES[self._read(0x14) & 0xF]
 
 
-class DvbEncoder(BaseMemoryRegion):
+class DvbEncoder(BaseMemoryRegion, _ShadowRegisters):
     def __init__(self, base_addr, length):
         super().__init__(base_addr, length)
         self._logger = logging.getLogger("DvbEncoder")
+        self._resetShadow()
 
-        self.input_width_converter = AxiDebug(
-            write=lambda addr, data: self._write(addr + 0xD00, data),
-            read=lambda addr: self._read(addr + 0xD00),
-        )
-        self.bb_scrambler = AxiDebug(
-            write=lambda addr, data: self._write(addr + 0xE00, data),
-            read=lambda addr: self._read(addr + 0xE00),
-        )
-        self.bch_encoder = AxiDebug(
-            write=lambda addr, data: self._write(addr + 0xF00, data),
-            read=lambda addr: self._read(addr + 0xF00),
-        )
-        self.ldpc_encoder = AxiDebug(
-            write=lambda addr, data: self._write(addr + 0x1000, data),
-            read=lambda addr: self._read(addr + 0x1000),
-        )
-        self.bit_interleaver = AxiDebug(
-            write=lambda addr, data: self._write(addr + 0x1100, data),
-            read=lambda addr: self._read(addr + 0x1100),
-        )
-        self.plframe = AxiDebug(
-            write=lambda addr, data: self._write(addr + 0x1200, data),
-            read=lambda addr: self._read(addr + 0x1200),
-        )
-        self.output = AxiDebug(
-            write=lambda addr, data: self._write(addr + 0x1300, data),
-            read=lambda addr: self._read(addr + 0x1300),
-        )
+        self.input_width_converter = AxiDebug(self, 0xD00)
+        self.bb_scrambler = AxiDebug(self, 0xE00)
+        self.bch_encoder = AxiDebug(self, 0xF00)
+        self.ldpc_encoder = AxiDebug(self, 0x1000)
+        self.bit_interleaver = AxiDebug(self, 0x1100)
+        self.plframe = AxiDebug(self, 0x1200)
+        self.output = AxiDebug(self, 0x1300)
+        self._waypoints = [(name, getattr(self, name)) for name in _WAYPOINT_NAMES]
 
     def write_polyphase_filter_coefficients(self):
         self._logger.info("Updating polyphase filter coefficients")
-        coeffs = [
-            -0.000728216778953,
-            0.00181682675611,
-            -0.00029152361094,
-            -0.00169956660829,
-            0.00198084092699,
-            0.000321642903145,
-            -0.00423926254734,
-            0.00304758665152,
-            0.00683168089017,
-            -0.00947270914912,
-            -0.00942199118435,
-            0.0211963132024,
-            0.0116332434118,
-            -0.0461302995682,
-            -0.0131214763969,
-            0.156597167253,
-            0.263359487057,
-            0.156597167253,
-            -0.0131214763969,
-            -0.0461302995682,
-            0.0116332434118,
-            0.0211963132024,
-            -0.00942199118435,
-            -0.00947270914912,
-            0.00683168089017,
-            0.00304758665152,
-            -0.00423926254734,
-            0.000321642903145,
-            0.00198084092699,
-            -0.00169956660829,
-            -0.00029152361094,
-            0.00181682675611,
-            -0.000728216778953,
-        ]
-
-        addr = 0x3CC
-        for coeff in coeffs:
-            reg = (toFixedPoint(coeff, 16) << 16) | toFixedPoint(coeff, 16)
-            self._logger.info("Writing: %.3x => %.8x", addr, reg)
-            self._write(addr, reg)
-            addr += 4
+        self._writeBlock(0x3CC, _POLYPHASE_REGS)
 
     def updateBitMapperRam(
         self,
@@ -355,52 +557,46 @@ class DvbEncoder(BaseMemoryRegion):
     ):
         self._logger.info("Updating bit mapper RAM for %s", constellation)
 
-        bit_mapper_ram_base_addr = 0x0C
+        regs = _BIT_MAPPER_REGS.get((frame_type, constellation, code_rate))
+        assert regs is not None, f"Constellation {constellation} not supported"
 
-        if constellation == ConstellationType.MOD_QPSK:
-            addr = 0
-        elif constellation == ConstellationType.MOD_8PSK:
-            addr = 4
-        elif constellation == ConstellationType.MOD_16APSK:
-            addr = 12
-        elif constellation == ConstellationType.MOD_32APSK:
-            addr = 28
-        else:
-            assert False, f"Constellation {constellation} not supported"
-
-        for offset, (cos, sin) in enumerate(
-            _getModulationTable(frame_type, constellation, code_rate),
-            addr,
-        ):
-            #  self._logger.info("Bit mapper RAM: %2d: % .3f, % .3f", offset, cos, sin)
-            reg = (toFixedPoint(cos, 16) << 16) | toFixedPoint(sin, 16)
-            addr = bit_mapper_ram_base_addr + 4 * offset
-            self._logger.debug("Writing addr 0x%.3X: 0x%.8X", addr, reg)
-            self._write(addr, reg)
+        self._writeBlock(*regs)
 
     def init(self):
         self._logger.info("Initializing DVB encoder")
+        # Register contents are unknown at this point
+        self._resetShadow()
+        for _, waypoint in self._waypoints:
+            waypoint._resetShadow()  # pylint: disable=protected-access
         self.write_polyphase_filter_coefficients()
 
     @property
     def physical_layer_scrambler_shift_reg_init(self) -> int:
-        return (self._read(0x0) >> 0x0) & 0x3FFFF
+        return self._read(0x0) & _PLSCR_MASK
 
     @physical_layer_scrambler_shift_reg_init.setter
     def physical_layer_scrambler_shift_reg_init(self, value: int):
-        current = self._read(0x0)
-        current = current & ~0x3FFFF | ((value & 0x3FFFF) << 0)
-        return self._write(0x0, current)
+        self._updateBits(0x0, _PLSCR_MASK, value)
 
     @property
     def enable_dummy_frames(self) -> int:
-        return (self._read(0x0) >> 0x12) & 0x1
+        return (self._read(0x0) >> _DUMMY_FRAMES_SHIFT) & 0x1
 
     @enable_dummy_frames.setter
     def enable_dummy_frames(self, value: int):
-        current = self._read(0x0)
-        current = current & ~0x40000 | ((value & 0x1) << 18)
-        return self._write(0x0, current)
+        self._updateBits(0x0, _DUMMY_FRAMES_MASK, value << _DUMMY_FRAMES_SHIFT)
+
+    def configure(
+        self, physical_layer_scrambler_shift_reg_init=None, enable_dummy_frames=None
+    ):
+        "Updates the given config fields with a single register write"
+        with self.batchedWrites():
+            if physical_layer_scrambler_shift_reg_init is not None:
+                self.physical_layer_scrambler_shift_reg_init = (
+                    physical_layer_scrambler_shift_reg_init
+                )
+            if enable_dummy_frames is not None:
+                self.enable_dummy_frames = enable_dummy_frames
 
     def getLdpcFifoStatusLdpcFifoEntries(self) -> int:
         return (self._read(0x4) >> 0x0) & 0x3FFF
@@ -414,30 +610,25 @@ class DvbEncoder(BaseMemoryRegion):
     def getFramesInTransit(self) -> int:
         return (self._read(0x8) >> 0x0) & 0xFF
 
+    def _collectWaypoints(self):
+        "Takes a snapshot of every AXI debug waypoint, in pipeline order"
+        return [(name, waypoint.snapshot()) for name, waypoint in self._waypoints]
+
     def getStatus(self):
+        # Both config fields live in the same register, read it only once
+        config = self._read(0x0)
         result = {
             "general": {
-                "physical_layer_scrambler_shift_reg_init": self.physical_layer_scrambler_shift_reg_init,
-                "enable_dummy_frames": self.enable_dummy_frames,
+                "physical_layer_scrambler_shift_reg_init": config & _PLSCR_MASK,
+                "enable_dummy_frames": (config >> _DUMMY_FRAMES_SHIFT) & 0x1,
                 "frames_in_transit": self.getFramesInTransit(),
             }
         }
 
         axi = {}
 
-        for name in (
-            "input_width_converter",
-            "bb_scrambler",
-            "bch_encoder",
-            "ldpc_encoder",
-            "bit_interleaver",
-            "plframe",
-            "output",
-        ):
-            axi[name] = {}
-            axi_debug = getattr(self, name)
-            strobes = axi_debug.getStrobes()
-            axi_debug.update()
+        for name, snapshot in self._collectWaypoints():
+            strobes = snapshot.strobes
             axi[name] = {
                 "axi_master": {
                     "tvalid": strobes.master.tvalid,
@@ -447,11 +638,11 @@ class DvbEncoder(BaseMemoryRegion):
                     "tvalid": strobes.slave.tvalid,
                     "tready": strobes.slave.tready,
                 },
-                "frames": axi_debug.getFrameCount(),
-                "words": axi_debug.word_count,
-                "last_frame_length": axi_debug.getLastFrameLength(),
-                "max_frame_length": axi_debug.max_frame_length,
-                "min_frame_length": axi_debug.min_frame_length,
+                "frames": snapshot.frame_count,
+                "words": snapshot.word_count,
+                "last_frame_length": snapshot.last_frame_length,
+                "max_frame_length": snapshot.max_frame_length,
+                "min_frame_length": snapshot.min_frame_length,
             }
 
         result["axi_debug"] = axi
@@ -461,107 +652,64 @@ class DvbEncoder(BaseMemoryRegion):
         self._write(0xC, addr)
         return self._read(0x14)
 
+    def readConstellationMapperRamRange(self, start, count) -> List[int]:
+        "Same as readConstellationMapperRam for count entries, taking the lock once"
+        values = []
+        with self._lock:
+            for addr in range(start, start + count):
+                self._writeUnlocked(0xC, addr)
+                values.append(self._readUnlocked(0x14))
+        return values
+
     def printStatus(self, print_map=False):
+        config = self._read(0x0)
         table = [
             ("General config",),
             (
                 "PL scramb SR init",
-                f"0x{self.physical_layer_scrambler_shift_reg_init:05X}",
+                f"0x{config & _PLSCR_MASK:05X}",
             ),
             (
                 "Enable dummy frames",
-                self.enable_dummy_frames,
+                (config >> _DUMMY_FRAMES_SHIFT) & 0x1,
             ),
             ("-----",),
             ("Status",),
             ("Frames in transit", self.getFramesInTransit()),
         ]
 
-        debug_table = [
-            (
-                "Waypoint",
-                "AXI slave",
-                "AXI master",
-                "Frames",
-                "Words",
-                "Last frame length",
-                "Max frame length",
-                "Min frame length",
+        debug_table = [_DEBUG_HEADER]
+
+        for name, snapshot in self._collectWaypoints():
+            strobes = snapshot.strobes
+            debug_table.append(
+                (
+                    name,
+                    f"tvalid={strobes.slave.tvalid}, tready={strobes.slave.tready}",
+                    f"tvalid={strobes.master.tvalid}, tready={strobes.master.tready}",
+                    snapshot.frame_count,
+                    snapshot.word_count,
+                    snapshot.last_frame_length,
+                    snapshot.max_frame_length,
+                    snapshot.min_frame_length,
+                )
             )
-        ]
 
-        for name in (
-            "input_width_converter",
-            "bb_scrambler",
-            "bch_encoder",
-            "ldpc_encoder",
-            "bit_interleaver",
-            "plframe",
-            "output",
-        ):
-            row = [
-                name,
-            ]
-            #  debug_table += [("-----",), (f"AXI debug - {name}",)]
-            axi_debug = getattr(self, name)
-            strobes = axi_debug.getStrobes()
-            axi_debug.update()
-            row += [
-                f"tvalid={strobes.slave.tvalid}, tready={strobes.slave.tready}",
-                f"tvalid={strobes.master.tvalid}, tready={strobes.master.tready}",
-                axi_debug.getFrameCount(),
-                axi_debug.word_count,
-                axi_debug.getLastFrameLength(),
-                axi_debug.max_frame_length,
-                axi_debug.min_frame_length,
-            ]
-            debug_table += [row]
-
-        output = (
-            ["{0} Debug tables {0}".format(50 * "=")]
-            + [" ".join(x) for x in tabulate(table)]
-            + ["-----"]
-            + [" ".join(x) for x in tabulate(debug_table)]
-        )
+        separator = 50 * "="
+        output = [f"{separator} Debug tables {separator}"]
+        output.extend(" ".join(x) for x in tabulate(table))
+        output.append("-----")
+        output.extend(" ".join(x) for x in tabulate(debug_table))
 
         if print_map:
-            func = self.readConstellationMapperRam
-
-            constellation_map = [
-                ["#" , "QPSK"             , "#" , "8PSK"              , "#" , "16APSK"            , "#" , "32APSK"]            ,
-                [0   , f"0x{func(0):08X}" , 0   , f"0x{func(4):08X}"  , 0   , f"0x{func(12):08X}" , 0   , f"0x{func(28):08X}"] ,
-                [1   , f"0x{func(1):08X}" , 1   , f"0x{func(5):08X}"  , 1   , f"0x{func(13):08X}" , 1   , f"0x{func(29):08X}"] ,
-                [2   , f"0x{func(2):08X}" , 2   , f"0x{func(6):08X}"  , 2   , f"0x{func(14):08X}" , 2   , f"0x{func(30):08X}"] ,
-                [3   , f"0x{func(3):08X}" , 3   , f"0x{func(7):08X}"  , 3   , f"0x{func(15):08X}" , 3   , f"0x{func(31):08X}"] ,
-                [""  , ""                 , 4   , f"0x{func(8):08X}"  , 4   , f"0x{func(16):08X}" , 4   , f"0x{func(32):08X}"] ,
-                [""  , ""                 , 5   , f"0x{func(9):08X}"  , 5   , f"0x{func(17):08X}" , 5   , f"0x{func(33):08X}"] ,
-                [""  , ""                 , 6   , f"0x{func(10):08X}" , 6   , f"0x{func(18):08X}" , 6   , f"0x{func(34):08X}"] ,
-                [""  , ""                 , 7   , f"0x{func(11):08X}" , 7   , f"0x{func(19):08X}" , 7   , f"0x{func(35):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 8   , f"0x{func(20):08X}" , 8   , f"0x{func(36):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 9   , f"0x{func(21):08X}" , 9   , f"0x{func(37):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 10  , f"0x{func(22):08X}" , 10  , f"0x{func(38):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 11  , f"0x{func(23):08X}" , 11  , f"0x{func(39):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 12  , f"0x{func(24):08X}" , 12  , f"0x{func(40):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 13  , f"0x{func(25):08X}" , 13  , f"0x{func(41):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 14  , f"0x{func(26):08X}" , 14  , f"0x{func(42):08X}"] ,
-                [""  , ""                 , ""  , ""                  , 15  , f"0x{func(27):08X}" , 15  , f"0x{func(43):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 16  , f"0x{func(44):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 17  , f"0x{func(45):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 18  , f"0x{func(46):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 19  , f"0x{func(47):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 20  , f"0x{func(48):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 21  , f"0x{func(49):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 22  , f"0x{func(50):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 23  , f"0x{func(51):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 24  , f"0x{func(52):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 25  , f"0x{func(53):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 26  , f"0x{func(54):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 27  , f"0x{func(55):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 28  , f"0x{func(56):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 29  , f"0x{func(57):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 30  , f"0x{func(58):08X}"] ,
-                [""  , ""                 , ""  , ""                  , ""  , ""                  , 31  , f"0x{func(59):08X}"] ,
-            ]
-            output += ["-----"] + [" ".join(x) for x in tabulate(constellation_map)]
-        output += [(2 * 50 + 14) * "="]
+            values = self.readConstellationMapperRamRange(0, _BIT_MAPPER_RAM_SIZE)
+            columns = []
+            for name, base_addr, size in _CONSTELLATION_SLOTS:
+                entries = values[base_addr : base_addr + size]
+                columns.append(("#", *range(size)))
+                columns.append((name, *(f"0x{value:08X}" for value in entries)))
+            constellation_map = list(zip_longest(*columns, fillvalue=""))
+            output.append("-----")
+            output.extend(" ".join(x) for x in tabulate(constellation_map))
+        output.append((2 * 50 + 14) * "=")
         print("\n".join(output))
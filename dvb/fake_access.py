@@ -1,11 +1,12 @@
 # pylint: disable=missing-docstring
 
 import logging
-from multiprocessing import Lock
+from threading import Lock
+from typing import Dict, Sequence, Tuple
 
 _logger = logging.getLogger(__name__)
 
-DATA = {}
+DATA: Dict[int, int] = {}
 
 
 def _dictWrite(addr: int, data: int):
@@ -22,18 +23,37 @@ class BaseMemoryRegion:
     _lock = Lock()
     _logger = logging.getLogger(__name__)
 
-    def __init__(self, base_addr, length):
+    def __init__(self, base_addr, length, **_):
         _logger.info("Creating object for 0x%X, length is %d", base_addr, length)
         self._base_addr = base_addr
         self._length = length
 
     def _write(self, addr: int, data: int):
-        self._logger.log(5, "W 0x%.8X <= 0x%.8X", addr, data)
         with self._lock:
-            _dictWrite(self._base_addr + addr, data)
+            self._writeUnlocked(addr, data)
 
     def _read(self, addr: int) -> int:
         with self._lock:
-            data = _dictRead(self._base_addr + addr)
+            return self._readUnlocked(addr)
+
+    def _writeUnlocked(self, addr: int, data: int):
+        self._logger.log(5, "W 0x%.8X <= 0x%.8X", addr, data)
+        _dictWrite(self._base_addr + addr, data)
+
+    def _readUnlocked(self, addr: int) -> int:
+        data = _dictRead(self._base_addr + addr)
         self._logger.log(5, "R 0x%.8X => 0x%.8X", addr, data)
         return data
+
+    def _writeBlock(self, addr: int, words: Sequence[int]):
+        with self._lock:
+            for offset, word in enumerate(words):
+                self._writeUnlocked(addr + 4 * offset, word)
+
+    def _readBlock(self, addr: int, count: int) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._readUnlocked(addr + 4 * i) for i in range(count))
+
+    def _writeFifo(self, addr: int, data: bytes):
+        for offset in range(0, len(data), 4):
+            self._write(addr, int.from_bytes(data[offset : offset + 4], "little"))
@@ -1,40 +1,31 @@
+import io
 import logging
 import os
 import os.path as p
 import sys
-from threading import Lock
 
 
 def setupLogging(stream, level, color=True):  # pragma: no cover
     "Setup logging according to the command line parameters"
     if isinstance(stream, str):
 
-        class Stream(object):
+        class Stream(io.TextIOWrapper):
             """
-            File subclass that allows RainbowLoggingHandler to write
-            with colors
+            Text file that allows RainbowLoggingHandler to write with colors
             """
 
-            _lock = Lock()
-            _color = color
-
-            def __init__(self, *args, **kwargs):
-                self._fd = open(*args, **kwargs)
-
             def isatty(self):
                 """
                 Tells if this stream accepts control chars
                 """
-                return self._color
-
-            def write(self, text):
-                """
-                Writes to the stream
-                """
-                with self._lock:
-                    self._fd.write(text.encode("utf-8", errors="replace"))
+                return color
 
-        _stream = Stream(stream, "ab", buffering=0)
+        _stream = Stream(
+            open(stream, "ab", buffering=0),
+            encoding="utf-8",
+            errors="replace",
+            write_through=True,
+        )
     else:
         _stream = stream
 
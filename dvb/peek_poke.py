@@ -2,12 +2,15 @@
 
 import logging
 import subprocess as subp
+from threading import Lock
+from typing import Sequence, Tuple
 
 _logger = logging.getLogger(__name__)
 
 
 def run(cmd):
-    _logger.debug("$ %s", " ".join(map(str, cmd)))
+    if _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug("$ %s", " ".join(map(str, cmd)))
     try:
         return subp.check_output(cmd)
     except subp.SubprocessError:
@@ -16,23 +19,77 @@ def run(cmd):
 
 
 def _poke(addr: int, data: int):
-    run(("poke", "0x%.8X" % addr, "0x%.8X" % data))
+    run(("poke", f"0x{addr:08X}", f"0x{data:08X}"))
 
 
 def _peek(addr: int) -> int:
     assert (addr >> 16) & 0xFF in (0xC0, 0xC1, 0xC2), f"Invalid address 0x{addr:X}"
-    result = run(("peek", "0x%8X" % addr)).strip()
+    result = run(("peek", f"0x{addr:8X}")).strip()
     return int(result, 16)
 
 
+# Pokes per shell invocation, keeps each command well below the kernel's
+# 128 KiB limit for a single argument
+_POKES_PER_SHELL = 1024
+
+
+def _pokeMany(pairs: Sequence[Tuple[int, int]]):
+    "Runs multiple pokes, spawning one shell per _POKES_PER_SHELL instead of one each"
+    for start in range(0, len(pairs), _POKES_PER_SHELL):
+        script = "; ".join(
+            f"poke 0x{addr:08X} 0x{data:08X}"
+            for addr, data in pairs[start : start + _POKES_PER_SHELL]
+        )
+        run(("sh", "-ec", script))
+
+
+def _peekBlock(addr: int, count: int) -> Tuple[int, ...]:
+    "Reads count consecutive registers with a single shell instead of one per peek"
+    addrs = range(addr, addr + 4 * count, 4)
+    for value in addrs:
+        page = (value >> 16) & 0xFF
+        assert page in (0xC0, 0xC1, 0xC2), f"Invalid address 0x{value:X}"
+    result = run(("sh", "-ec", "; ".join(f"peek 0x{value:08X}" for value in addrs)))
+    return tuple(int(value, 16) for value in result.split())
+
+
 class BaseMemoryRegion:
-    def __init__(self, base_addr, length):
+    _lock = Lock()
+
+    def __init__(self, base_addr, length, **_):
         _logger.info("Creating object for 0x%X, length is %d", base_addr, length)
         self._base_addr = base_addr
         self._length = length
 
     def _write(self, addr: int, data: int):
-        _poke(self._base_addr + addr, data)
+        with self._lock:
+            self._writeUnlocked(addr, data)
 
     def _read(self, addr) -> int:
+        with self._lock:
+            return self._readUnlocked(addr)
+
+    def _writeUnlocked(self, addr: int, data: int):
+        _poke(self._base_addr + addr, data)
+
+    def _readUnlocked(self, addr) -> int:
         return _peek(self._base_addr + addr)
+
+    def _writeBlock(self, addr: int, words: Sequence[int]):
+        base_addr = self._base_addr + addr
+        pairs = [(base_addr + 4 * offset, word) for offset, word in enumerate(words)]
+        with self._lock:
+            _pokeMany(pairs)
+
+    def _readBlock(self, addr: int, count: int) -> Tuple[int, ...]:
+        with self._lock:
+            return _peekBlock(self._base_addr + addr, count)
+
+    def _writeFifo(self, addr: int, data: bytes):
+        fifo_addr = self._base_addr + addr
+        pairs = [
+            (fifo_addr, int.from_bytes(data[offset : offset + 4], "little"))
+            for offset in range(0, len(data), 4)
+        ]
+        with self._lock:
+            _pokeMany(pairs)
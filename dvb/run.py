@@ -2,20 +2,22 @@
 
 import argparse
 import logging
+import math
+import mmap
 import os
 import os.path as p
 import re
-import struct
 import sys
 import time
-from multiprocessing.pool import ThreadPool
-from typing import Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
-from matplotlib import pyplot as plt  # type: ignore
 
 from dvb.common import (
-    TID_MAP,
+    TID_MAP_FLAT,
     BaseMemoryRegion,
     CodeRate,
     ConstellationType,
@@ -24,6 +26,7 @@ from dvb.common import (
 )
 from dvb.dvb_encoder import DvbEncoder  # type: ignore
 from dvb.logger import setupLogging
+from dvb.samples import MAX_REPORTS, Buffer, mapFile, scan
 
 # pylint: disable=missing-docstring
 # pylint: disable=invalid-name
@@ -34,10 +37,17 @@ _RE_CONFIG = re.compile(
     r"(FECFRAME_(?:SHORT|NORMAL))_(MOD_.*?)_(C.*?)_input.bin"
 ).search
 
+_INPUT_SUFFIX = "_input.bin"
+
 _logger = logging.getLogger(__name__)
 
 TOLERANCE = 64
 
+# Bytes requested per read from the card, a short read marks the end of a frame
+_READ_SIZE = 64 * 1024
+# Initial size of the read buffer, large enough for a normal frame
+_READ_BUFFER_SIZE = 4 * _READ_SIZE
+
 SUPPORTED_CONFIGS = {
     "FECFRAME_SHORT_MOD_QPSK_C8_9_input.bin",
     "FECFRAME_SHORT_MOD_QPSK_C5_6_input.bin",
@@ -94,14 +104,97 @@ SUPPORTED_CONFIGS = {
 }
 
 
-def _toListOfInt(data: bytes) -> Tuple[Any, ...]:
+@lru_cache(maxsize=None)
+def _parseConfig(basename: str) -> Tuple[FrameType, ConstellationType, CodeRate]:
+    "Extracts the config from an input file name, each name is parsed only once"
+    # Names follow FECFRAME_<type>_MOD_<constellation>_C<rate>_input.bin, which
+    # a plain split handles. Anything else goes through the regex
+    parts = basename[: -len(_INPUT_SUFFIX)].split("_")
+    if (
+        basename.endswith(_INPUT_SUFFIX)
+        and len(parts) == 6
+        and parts[0] == "FECFRAME"
+        and parts[2] == "MOD"
+    ):
+        frame_type = "_".join(parts[:2])
+        constellation = "_".join(parts[2:4])
+        code_rate = "_".join(parts[4:])
+    else:
+        match = _RE_CONFIG(basename)
+        assert match is not None, f"Unable to parse config from {basename}"
+        frame_type, constellation, code_rate = match.groups()
+    return (
+        FrameType[frame_type],
+        ConstellationType[constellation],
+        CodeRate[code_rate],
+    )
+
+
+def _toListOfInt(data: Buffer) -> np.ndarray:
     _logger.debug("Data length is %d bytes", len(data))
-    return struct.unpack("<" + "h" * (len(data) // 2), data)
+    return np.frombuffer(data, dtype="<i2")
+
+
+@lru_cache(maxsize=64)
+def _mapFileVersion(
+    path: str, mtime_ns: int, size: int  # pylint: disable=unused-argument
+) -> np.ndarray:
+    "Maps a file as int16, mtime and size are only part of the cache key to spot edits"
+    return _toListOfInt(mapFile(path))
+
+
+def _loadExpected(path: str) -> np.ndarray:
+    """
+    Returns the contents of an expected output file, reusing the previous array
+    while the file is unchanged. Arrays are read only, so sharing them is safe
+    """
+    stat = os.stat(path)
+    return _mapFileVersion(path, stat.st_mtime_ns, stat.st_size)
+
+
+def _writeAll(fd: int, data: Buffer) -> int:
+    "Writes data to fd with as few syscalls as possible, retrying short writes"
+    written = 0
+    with memoryview(data) as view:
+        while written < len(view):
+            written += os.write(fd, view[written:])
+    return written
+
+
+@contextmanager
+def _mapInput(path: str):
+    "Maps a file read only for as long as the context is active"
+    data = mapFile(path)
+    if not isinstance(data, mmap.mmap):
+        # Empty files aren't mapped
+        yield data
+        return
+    with data:
+        try:
+            data.madvise(mmap.MADV_SEQUENTIAL)
+        except (AttributeError, OSError):
+            _logger.debug("Unable to set MADV_SEQUENTIAL for %s", path)
+        yield data
+
+
+def _swapHalfWords(data: memoryview):
+    """
+    Swaps the 16-bit halves of every 32-bit word read from the card in place.
+    Trailing bytes that don't make up a full word become tail[2:4] + tail[0:2]
+    """
+    full_words = len(data) // 4
+    words = np.frombuffer(data, dtype="<u4", count=full_words)
+    np.bitwise_or(words << 16, words >> 16, out=words)
+    tail = bytes(data[4 * full_words :])
+    data[4 * full_words :] = tail[2:4] + tail[0:2]
 
 
 def _compare(
-    actual: Tuple[int, ...], expected: Tuple[int, ...], tolerance: int
+    actual: np.ndarray, expected: np.ndarray, tolerance: int
 ) -> Tuple[bool, float]:
+    # Widen the int16 samples so that thresholds and deltas can't overflow
+    actual = np.asarray(actual, dtype=np.int32)
+    expected = np.asarray(expected, dtype=np.int32)
     if len(actual) != len(expected):
         _logger.warning("Expected %d bytes, got %d", len(actual), len(expected))
 
@@ -109,45 +202,48 @@ def _compare(
     _logger.debug(
         "Input lengths were %d and %d, using %d", len(actual), len(expected), length
     )
+    errors, _, first_errors, sums = scan(
+        actual[:length], expected[:length], tolerance, MAX_REPORTS
+    )
+    passed = errors < MAX_REPORTS
+
+    # Pearson correlation coefficient from raw sums, avoids the stacked copy and
+    # the full covariance matrix np.corrcoef() builds. Sums are converted to
+    # Python ints so that the products below can't overflow
+    sum_x, sum_y, sum_xy, sum_xx, sum_yy = (int(value) for value in sums)
     correlation = 0.0
-    if length:
-        correlation_matrix = np.corrcoef(actual[:length], expected[:length])
-        correlation = min(correlation_matrix[0][1], correlation_matrix[1][0])
+    denominator = math.sqrt(
+        (length * sum_xx - sum_x * sum_x) * (length * sum_yy - sum_y * sum_y)
+    )
+    if denominator:
+        correlation = (length * sum_xy - sum_x * sum_y) / denominator
     _logger.info("Data correlation is %s", correlation)
 
-    errors = 0
-    passed = True
-    for i, expected_word in enumerate(expected):
-        try:
-            actual_word = actual[i]
-        except IndexError:
-            _logger.warning("Can't compare data, index %d was not found", i)
-            passed = False
-            break
-
-        lower_threshold = expected_word - tolerance
-        upper_threshold = expected_word + tolerance
-
-        if lower_threshold <= actual_word <= upper_threshold:
-            func = _logger.debug
-        else:
-            func = _logger.error
-            errors += 1
-
-        if passed:
-            func(
-                "%4d || Got %6d, expected %6d || Thresholds: [%6d, %6d] || delta = %d",
-                i,
-                actual_word,
-                expected_word,
-                lower_threshold,
-                upper_threshold,
-                expected_word - actual_word,
-            )
+    # Samples are only logged up to the last reported error and good samples
+    # only show up in the debug log, so skip them altogether when it's off
+    if not _logger.isEnabledFor(logging.DEBUG):
+        indexes = first_errors
+    elif passed:
+        indexes = range(length)
+    else:
+        indexes = range(first_errors[-1] + 1)
+
+    for i in indexes:
+        delta = expected[i] - actual[i]
+        func = _logger.error if abs(delta) > tolerance else _logger.debug
+        func(
+            "%4d || Got %6d, expected %6d || Thresholds: [%6d, %6d] || delta = %d",
+            i,
+            actual[i],
+            expected[i],
+            expected[i] - tolerance,
+            expected[i] + tolerance,
+            delta,
+        )
 
-        if errors >= 10:
-            passed = False
-            #  break
+    if len(actual) < len(expected):
+        _logger.warning("Can't compare data, index %d was not found", length)
+        passed = False
 
     if errors:
         _logger.error(
@@ -217,6 +313,11 @@ class Runner:
     _dev_metadata = "/dev/xdma0_h2c_1"
 
     def __init__(self):
+        # Metadata and data are written concurrently, reuse the same threads
+        # for every frame. Set up before the encoder so that close() has
+        # something to release if creating it fails
+        self._pool: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(max_workers=2)
+        self._device_fds: Dict[str, int] = {}
         _logger.debug("Creating encoder")
         self.encoder = DvbEncoder(0, 16 * 1024)
         #  self.init()
@@ -230,7 +331,11 @@ class Runner:
         constellation: ConstellationType,
         code_rate: CodeRate,
     ):
-        tid = TID_MAP[frame_type][constellation][code_rate]
+        pool = self._pool
+        if pool is None:
+            raise RuntimeError("Runner has already been closed")
+
+        tid = TID_MAP_FLAT[frame_type, constellation, code_rate]
         _logger.info(
             "TID for %s, %s, %s is %d (0x%.2X)",
             frame_type,
@@ -247,96 +352,115 @@ class Runner:
         #  _logger.info("Status before any write")
         #  self.encoder.printStatus()
 
-        pool = ThreadPool(2)
-        pool.apply_async(self.writeMetadata, (tid.to_bytes(1, "little"),))
+        writes = [pool.submit(self.writeMetadata, tid.to_bytes(1, "little"))]
 
-        with open(path, "rb") as fd:
-            pool.apply_async(self.writeData, (fd.read(),))
+        with _mapInput(path) as data:
+            writes.append(pool.submit(self.writeData, data))
 
-        pool.close()
-        #  _logger.info("Status right after writing")
-        #  self.encoder.printStatus()
-        _logger.debug("Waiting for processes to complete")
-        pool.join()
+            #  _logger.info("Status right after writing")
+            #  self.encoder.printStatus()
+            _logger.debug("Waiting for processes to complete")
+            # Let both writes finish before unmapping the data, even if one fails
+            wait(writes)
+
+        for write in writes:
+            write.result()
         #  _logger.info("Status after writes completed")
         #  self.encoder.printStatus()
         _logger.debug("All writes completed")
 
+    def _openDevice(self, path: str) -> int:
+        "Opens a device for writing on first use, it's then kept open for later frames"
+        fd = self._device_fds.get(path)
+        if fd is None:
+            fd = self._device_fds[path] = os.open(path, os.O_WRONLY)
+        return fd
+
+    def close(self):
+        """
+        Releases the thread pool and the device fds. Safe to call more than once
+        and from __del__, including when __init__ didn't complete
+        """
+        pool, self._pool = getattr(self, "_pool", None), None
+        if pool is not None:
+            pool.shutdown()
+        fds = getattr(self, "_device_fds", {})
+        while fds:
+            _, fd = fds.popitem()
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __del__(self):
+        self.close()
+
     def writeMetadata(self, tid: bytes):
         _logger.debug("Writing metadata")
-        with open(self._dev_metadata, "wb") as fd:
-            _logger.debug("Writing to fd")
-            result = fd.write(tid)
+        fd = self._openDevice(self._dev_metadata)
+        _logger.debug("Writing to fd")
+        result = _writeAll(fd, tid)
 
         _logger.debug("Completed")
         return result
 
     def writeData(self, data: bytes):
         _logger.debug("Writing data")
-        with open(self._dev_write_data, "wb") as fd:
-            _logger.debug("Writing to fd")
-            result = fd.write(data)
+        fd = self._openDevice(self._dev_write_data)
+        _logger.debug("Writing to fd")
+        result = _writeAll(fd, data)
 
         _logger.debug("Completed")
         return result
 
-    def readData(self) -> bytes:
+    def readData(self) -> np.ndarray:
         _logger.debug("Reading data")
-        result: bytes = b""
+        # Read straight into a preallocated buffer, it only grows for frames
+        # larger than it
+        buffer = bytearray(_READ_BUFFER_SIZE)
+        size = 0
         #  return result
         fd = os.open(self._dev_read_data, os.O_RDONLY)
         try:
             while True:
-                _logger.log(5, "Bytes so far: %d", len(result))
-
-                #  chunk = bytes([x for i, x in enumerate(os.read(fd, 32)) if i % 8 < 4])
-                chunk = os.read(fd, 32)
-
-                _logger.log(5, "Chunk length is %d", len(chunk))
-
-                if len(result) < 1024:
-                    _logger.debug("Chunk: %s", [f"{x:02x}" for x in chunk])
-
-                result += (
-                    chunk[2:4]
-                    + chunk[0:2]
-                    + chunk[6:8]
-                    + chunk[4:6]
-                    + chunk[10:12]
-                    + chunk[8:10]
-                    + chunk[14:16]
-                    + chunk[12:14]
-                    + chunk[18:20]
-                    + chunk[16:18]
-                    + chunk[22:24]
-                    + chunk[20:22]
-                    + chunk[26:28]
-                    + chunk[24:26]
-                    + chunk[30:32]
-                    + chunk[28:30]
-                )
-
-                if len(result) < 1024:
-                    _logger.debug("Chunk: %s", [f"{x:02x}" for x in chunk])
-
-                if len(chunk) < 32:
-                    _logger.log(
-                        5, "Chunk has %d bytes, detected end of frame", len(chunk)
+                _logger.log(5, "Bytes so far: %d", size)
+
+                if size + _READ_SIZE > len(buffer):
+                    buffer.extend(bytes(len(buffer)))
+
+                with memoryview(buffer) as view:
+                    count = os.readv(fd, (view[size : size + _READ_SIZE],))
+
+                _logger.log(5, "Chunk length is %d", count)
+
+                if size < 1024 and _logger.isEnabledFor(logging.DEBUG):
+                    _logger.debug(
+                        "Chunk: %s",
+                        [f"{x:02x}" for x in buffer[size : min(size + count, 1024)]],
                     )
+
+                size += count
+
+                if count < _READ_SIZE:
+                    _logger.log(5, "Chunk has %d bytes, detected end of frame", count)
                     break
 
         finally:
             os.close(fd)
 
-        if not result:
+        if not size:
             _logger.error("Timed out trying to read data")
 
-        with open("output.bin", "wb") as fp:
-            fp.write(bytes(result))
+        # Swap and save straight from the read buffer, the returned array is a
+        # view of it as well
+        with memoryview(buffer) as view:
+            _swapHalfWords(view[:size])
+            with open("output.bin", "wb") as fp:
+                _writeAll(fp.fileno(), view[:size])
 
         _logger.debug("Completed")
-        _logger.info("Read %d bytes", len(result))
-        return result
+        _logger.info("Read %d bytes", size)
+        return np.frombuffer(buffer, dtype="<i2", count=size // 2)
 
     def run(self, infile: Optional[str]) -> Tuple[bool, float]:
         if infile is None:
@@ -348,38 +472,23 @@ class Runner:
             _logger.warning("Configuration %s is not supported", infile)
 
         outfile = infile.replace("_input", "_output")
-        match = _RE_CONFIG(infile)
-        assert match is not None
-        frame_type, constellation, code_rate = match.groups()
+        frame_type, constellation, code_rate = _parseConfig(p.basename(infile))
         #  print("Status before sending data")
         #  self.encoder.printStatus()
 
-        self.sendFromFile(
-            infile,
-            getattr(FrameType, frame_type),
-            getattr(ConstellationType, constellation),
-            getattr(CodeRate, code_rate),
-        )
-
-        #  _logger.info("Waiting for frame to complete")
-        #  for _ in range(100):
-        #      if not self.encoder.getFramesInTransit():
-        #          break
-        #      time.sleep(0.1)
-        #  if self.encoder.getFramesInTransit():
-        #      assert False, "Timed out waiting for frame to complete"
-        #  _logger.info("No more frames in transit")
+        self.sendFromFile(infile, frame_type, constellation, code_rate)
 
+        # No need to poll getFramesInTransit() here, reading from the c2h
+        # device blocks until the frame is available
         try:
-            result = _toListOfInt(self.readData())
+            result = self.readData()
         except KeyboardInterrupt:
             _logger.error("Unable to read data after sending %s", infile)
             raise
         #  print("Status after sending data")
         #  self.encoder.printStatus()
 
-        with open(outfile, "rb") as fd:
-            expected = _toListOfInt(fd.read())
+        expected = _loadExpected(outfile)
 
         #  print("Status after receiving data")
         #  self.encoder.printStatus()
@@ -0,0 +1,95 @@
+# pylint: disable=missing-docstring
+
+import mmap
+import os
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
+
+njit: Optional[Callable] = None
+try:
+    from numba import njit as _njit
+except ImportError:  # pragma: no cover
+    pass
+else:
+    njit = _njit
+
+# Anything np.frombuffer and os.write accept
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# Number of mismatches reported in detail, reaching it fails a test
+MAX_REPORTS = 10
+
+
+def mapFile(path: str) -> Union[mmap.mmap, bytes]:
+    "Maps a file read only, empty files can't be mapped so b'' is returned instead"
+    with open(path, "rb") as fd:
+        if not os.fstat(fd.fileno()).st_size:
+            return b""
+        return mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def scanLoop(
+    actual: np.ndarray, expected: np.ndarray, tolerance: int, max_reports: int
+) -> Tuple[int, int, np.ndarray, np.ndarray]:
+    """
+    Returns the number of samples off by more than tolerance, the max absolute
+    delta, the indexes of the first max_reports errors and the sums needed for
+    the correlation (x, y, xy, xx and yy) in a single pass
+    """
+    errors = 0
+    max_delta = 0
+    first_errors = np.empty(max_reports, dtype=np.int64)
+    sums = np.zeros(5, dtype=np.int64)
+    for i in range(actual.size):
+        x = int(actual[i])
+        y = int(expected[i])
+        delta = abs(y - x)
+        if delta > max_delta:
+            max_delta = delta
+        if delta > tolerance:
+            if errors < max_reports:
+                first_errors[errors] = i
+            errors += 1
+        sums[0] += x
+        sums[1] += y
+        sums[2] += x * y
+        sums[3] += x * x
+        sums[4] += y * y
+    return errors, max_delta, first_errors[: min(errors, max_reports)], sums
+
+
+def scanVectorised(
+    actual: np.ndarray, expected: np.ndarray, tolerance: int, max_reports: int
+) -> Tuple[int, int, np.ndarray, np.ndarray]:
+    "NumPy version of scanLoop, used when Numba is not installed"
+    x = actual.astype(np.int64)
+    y = expected.astype(np.int64)
+    abs_delta = np.abs(y - x)
+    errors_mask = abs_delta > tolerance
+    sums = np.array(
+        (x.sum(), y.sum(), np.dot(x, y), np.dot(x, x), np.dot(y, y)), dtype=np.int64
+    )
+    return (
+        int(np.count_nonzero(errors_mask)),
+        int(abs_delta.max()) if abs_delta.size else 0,
+        np.flatnonzero(errors_mask)[:max_reports],
+        sums,
+    )
+
+
+def _compile(func):
+    """
+    Compiles func with Numba, which happens on the first call. Compiled code is
+    cached next to this file or, if that's read only, in the user cache dir
+    (NUMBA_CACHE_DIR overrides both). Numba refuses to cache when none of them
+    is writable, so compile without a cache in that case
+    """
+    try:
+        return njit(cache=True)(func)
+    except RuntimeError:
+        return njit(func)
+
+
+# Interpreted, the loop is far slower than the NumPy version
+scan = scanVectorised if njit is None else _compile(scanLoop)
@@ -4,8 +4,10 @@ import atexit
 import logging
 import mmap
 import re
+import struct
 import subprocess as subp
-from multiprocessing import Lock
+from threading import Lock
+from typing import Sequence, Tuple
 
 _logger = logging.getLogger(__name__)
 
@@ -13,23 +15,37 @@ _RE_READ = re.compile(
     b"Read 32-bit value at address .*?: 0x(?P<data>[0-9a-f]+)", flags=re.M
 )
 
+_U32 = struct.Struct("<I")
+
 
 class BaseMemoryRegion:
-    _fd = open("/dev/xdma0_user", "wb")
+    _fd = None
     _lock = Lock()
 
     @staticmethod
-    @atexit.register
+    def openIoMem():
+        """
+        Opens /dev/xdma0_user on the first call only, so that importing this module
+        doesn't touch the device
+        """
+        with BaseMemoryRegion._lock:
+            if BaseMemoryRegion._fd is None:
+                _logger.info("Opening /dev/xdma0_user")
+                BaseMemoryRegion._fd = open("/dev/xdma0_user", "wb")
+                atexit.register(BaseMemoryRegion.closeIoMem)
+        return BaseMemoryRegion._fd
+
+    @staticmethod
     def closeIoMem():
-        _logger.info("Closing /dev/mem file pointer")
+        _logger.info("Closing /dev/xdma0_user file pointer")
         BaseMemoryRegion._fd.close()
 
-    def __init__(self, base_addr, length):
+    def __init__(self, base_addr, length, **_):
         _logger.info("Creating object for 0x%X, length is %d", base_addr, length)
         self._base_addr = base_addr
         self._length = length
         self._mmap = mmap.mmap(
-            fileno=self._fd.fileno(),
+            fileno=self.openIoMem().fileno(),
             length=length,
             offset=base_addr,
             access=mmap.MAP_SHARED,
@@ -42,25 +58,72 @@ class BaseMemoryRegion:
 
     def _write(self, addr: int, data: int):
         with self._lock:
+            self._writeUnlocked(addr, data)
+
+    def _read(self, addr: int) -> int:
+        with self._lock:
+            return self._readUnlocked(addr)
+
+    def _writeUnlocked(self, addr: int, data: int):
+        "Same as _write but expects the caller to hold self._lock"
+        if _logger.isEnabledFor(logging.DEBUG):
             _logger.debug("W @ 0x%.8X: 0x%.8X", self._base_addr + addr, data)
+        try:
+            _U32.pack_into(self._mmap, addr, data)
+        except:
+            _logger.error("Failed to write to 0x%.8X", addr)
+            raise
+
+    def _readUnlocked(self, addr: int) -> int:
+        "Same as _read but expects the caller to hold self._lock"
+        #  _logger.debug("R @ 0x%.8X: ?", self._base_addr + addr)
+        try:
+            data = _U32.unpack_from(self._mmap, addr)[0]
+        except:
+            _logger.error("Failed to read from 0x%.8X", addr)
+            raise
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("R @ 0x%.8X: 0x%.8X", self._base_addr + addr, data)
+        return data
+
+    def _writeBlock(self, addr: int, words: Sequence[int]):
+        "Writes words to consecutive registers starting at addr"
+        data = struct.pack(f"<{len(words)}I", *words)
+        with self._lock:
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug(
+                    "W @ 0x%.8X: %d words", self._base_addr + addr, len(words)
+                )
             try:
-                self._mmap.seek(addr)
-                self._mmap.write(data.to_bytes(4, "little"))
+                self._mmap[addr : addr + len(data)] = data
             except:
                 _logger.error("Failed to write to 0x%.8X", addr)
                 raise
 
-    def _read(self, addr: int) -> int:
+    def _readBlock(self, addr: int, count: int) -> Tuple[int, ...]:
+        "Reads count consecutive registers starting at addr"
         with self._lock:
-            #  _logger.debug("R @ 0x%.8X: ?", self._base_addr + addr)
             try:
-                self._mmap.seek(addr)
-                data = int.from_bytes(self._mmap.read(4), "little")
+                data = struct.unpack_from(f"<{count}I", self._mmap, addr)
             except:
                 _logger.error("Failed to read from 0x%.8X", addr)
                 raise
-            _logger.debug("R @ 0x%.8X: 0x%.8X", self._base_addr + addr, data)
-            return data
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("R @ 0x%.8X: %d words", self._base_addr + addr, count)
+        return data
+
+    def _writeFifo(self, addr: int, data: bytes):
+        "Pushes data into a FIFO register, one 4-byte beat at a time"
+        with self._lock:
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug("W @ 0x%.8X: %d bytes", self._base_addr + addr, len(data))
+            mm = self._mmap
+            try:
+                for offset in range(0, len(data), 4):
+                    mm[addr : addr + 4] = data[offset : offset + 4]
+            except:
+                _logger.error("Failed to write to 0x%.8X", addr)
+                raise
 
 
 # def run(cmd):
@@ -14,35 +14,8 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with HDL Checker.  If not, see <http://www.gnu.org/licenses/>.
-"HDL Checker installation script"
+"Setuptools stub, package metadata lives in pyproject.toml"
 
 import setuptools  # type: ignore
 
-setuptools.setup(
-    name="dvb",
-    version="0.1",
-    description="DVB Helper",
-    author="Andre Souto",
-    author_email="andre820@gmail.com",
-    platforms="any",
-    packages=setuptools.find_packages(),
-    install_requires=[
-        "argcomplete",
-        "argparse",
-        'backports.functools_lru_cache; python_version<"3.2"',
-        "bottle>=0.12.9",
-        'enum34>=1.1.6; python_version<"3.3"',
-        "requests>=2.20.0",
-        "tabulate>=0.8.5",
-        "typing>=3.7.4",
-        "waitress>=0.9.0",
-        "numpy>=2.2.6",
-    ],
-    entry_points={
-        "console_scripts": [
-            "dvb_status=dvb.__main__:dvbStatus",
-            "dvb_test=dvb.run:main",
-            "dvb_compare=dvb.compare:main",
-        ]
-    },
-)
+setuptools.setup(platforms="any")
@@ -0,0 +1,15 @@
+# pylint: disable=missing-docstring
+
+from dvb.common import tabulate
+
+
+def test_tabulate():
+    assert tabulate([["a", 1], ["bbb"], [None, "cc", 3]]) == [
+        ["a   ", "1 "],
+        ["bbb "],
+        ["None", "cc", "3"],
+    ]
+
+
+def test_tabulateEmpty():
+    assert tabulate([]) == []
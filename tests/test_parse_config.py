@@ -0,0 +1,39 @@
+# pylint: disable=missing-docstring
+
+import pytest
+
+from dvb.common import CodeRate, ConstellationType, FrameType
+from dvb.run import SUPPORTED_CONFIGS, _parseConfig
+
+
+def test_parseConfig():
+    assert _parseConfig("FECFRAME_NORMAL_MOD_16APSK_C9_10_input.bin") == (
+        FrameType.FECFRAME_NORMAL,
+        ConstellationType.MOD_16APSK,
+        CodeRate.C9_10,
+    )
+
+
+@pytest.mark.parametrize("basename", sorted(SUPPORTED_CONFIGS))
+def test_parseSupportedConfigs(basename):
+    frame_type, constellation, code_rate = _parseConfig(basename)
+    expected = f"{frame_type.name}_{constellation.name}_{code_rate.name}_input.bin"
+    assert basename == expected
+
+
+def test_parseConfigFallsBackToRegex():
+    assert _parseConfig("prefix_FECFRAME_SHORT_MOD_QPSK_C1_4_input.bin") == (
+        FrameType.FECFRAME_SHORT,
+        ConstellationType.MOD_QPSK,
+        CodeRate.C1_4,
+    )
+
+
+def test_parseConfigIsCached():
+    basename = "FECFRAME_SHORT_MOD_8PSK_C2_3_input.bin"
+    assert _parseConfig(basename) is _parseConfig(basename)
+
+
+def test_parseInvalidConfig():
+    with pytest.raises(AssertionError):
+        _parseConfig("not_a_config.bin")
@@ -0,0 +1,65 @@
+# pylint: disable=missing-docstring
+
+import numpy as np
+import pytest
+
+from dvb.samples import MAX_REPORTS, mapFile, scan, scanLoop, scanVectorised
+
+
+def _assertScansAgree(actual, expected, tolerance):
+    "Runs every kernel, scan is the Numba compiled loop when Numba is installed"
+    vectorised = scanVectorised(actual, expected, tolerance, MAX_REPORTS)
+    for kernel in (scanLoop, scan):
+        result = kernel(actual, expected, tolerance, MAX_REPORTS)
+        assert result[0] == vectorised[0]
+        assert result[1] == vectorised[1]
+        np.testing.assert_array_equal(result[2], vectorised[2])
+        np.testing.assert_array_equal(result[3], vectorised[3])
+    return vectorised
+
+
+def test_scanEmptyInput():
+    empty = np.array([], dtype=np.int32)
+    errors, max_delta, first_errors, sums = _assertScansAgree(empty, empty, 64)
+    assert errors == 0
+    assert max_delta == 0
+    assert first_errors.size == 0
+    np.testing.assert_array_equal(sums, np.zeros(5))
+
+
+@pytest.mark.parametrize("length", (1, 7, 1000))
+@pytest.mark.parametrize("noise", (0, 64, 5000))
+def test_scanKernelsAgree(length, noise):
+    rng = np.random.default_rng(length * noise)
+    expected = rng.integers(-(1 << 15), 1 << 15, length, dtype=np.int32)
+    actual = expected + rng.integers(-noise, noise + 1, length, dtype=np.int32)
+    _assertScansAgree(actual, expected, 64)
+
+
+def test_scanReportsFirstErrorsOnly():
+    expected = np.zeros(3 * MAX_REPORTS, dtype=np.int32)
+    actual = expected.copy()
+    actual[1::2] = 100
+    errors, max_delta, first_errors, _ = _assertScansAgree(actual, expected, 64)
+    assert errors == len(actual) // 2
+    assert max_delta == 100
+    np.testing.assert_array_equal(first_errors, np.arange(1, 2 * MAX_REPORTS, 2))
+
+
+def test_scanSumsDontOverflow():
+    # Products of full scale int16 samples overflow int32 once summed
+    actual = np.full(1 << 16, -(1 << 15), dtype=np.int32)
+    _, _, _, sums = _assertScansAgree(actual, actual, 64)
+    assert int(sums[2]) == (1 << 16) * (1 << 30)
+
+
+def test_mapFile(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"\x01\x02\x03\x04")
+    assert bytes(mapFile(str(path))) == b"\x01\x02\x03\x04"
+
+
+def test_mapEmptyFile(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert mapFile(str(path)) == b""
@@ -0,0 +1,101 @@
+# pylint: disable=missing-docstring
+
+import pytest
+
+from dvb import fake_access
+from dvb.dvb_encoder import AxiDebug, DvbEncoder, _ShadowRegisters  # type: ignore
+
+
+class _Registers(_ShadowRegisters):
+    def __init__(self):
+        self._resetShadow()
+        self.regs = {0: 0xF0}
+        self.reads = []
+        self.writes = []
+
+    def _read(self, addr):
+        self.reads.append(addr)
+        return self.regs[addr]
+
+    def _write(self, addr, data):
+        self.writes.append((addr, data))
+        self.regs[addr] = data
+
+
+def test_updateBitsReadsOnlyOnce():
+    regs = _Registers()
+    regs._updateBits(0, 0x1, 1)
+    regs._updateBits(0, 0x2, 0x2)
+    assert regs.reads == [0]
+    assert regs.writes == [(0, 0xF1), (0, 0xF3)]
+
+
+def test_resetShadowReadsAgain():
+    regs = _Registers()
+    regs._updateBits(0, 0x1, 1)
+    # Something else changes the register, the shadow has to be dropped
+    regs.regs[0] = 0x0E
+    regs._resetShadow()
+    regs._updateBits(0, 0x2, 0)
+    assert regs.regs[0] == 0x0C
+    assert regs.reads == [0, 0]
+
+
+def test_batchedWritesReadAndWriteOnce():
+    regs = _Registers()
+    with regs.batchedWrites():
+        regs._updateBits(0, 0x1, 1)
+        with regs.batchedWrites():
+            regs._updateBits(0, 0x2, 2)
+        regs._updateBits(0, 0x10, 0)
+        assert not regs.writes
+    assert regs.reads == [0]
+    assert regs.writes == [(0, 0xE3)]
+
+
+def test_batchedWritesDropsUpdatesOnError():
+    regs = _Registers()
+    with pytest.raises(ValueError):
+        with regs.batchedWrites():
+            regs._updateBits(0, 0x1, 1)
+            raise ValueError
+    assert not regs.writes
+    # The shadow was dropped as well, so the update starts from the register
+    regs._updateBits(0, 0x2, 2)
+    assert regs.reads == [0, 0]
+    assert regs.writes == [(0, 0xF2)]
+
+
+def test_encoderConfigureKeepsOtherFields(monkeypatch):
+    monkeypatch.setattr(fake_access, "DATA", {})
+    encoder = DvbEncoder(0, 16 * 1024)
+    encoder.configure(physical_layer_scrambler_shift_reg_init=5, enable_dummy_frames=1)
+    assert fake_access.DATA[0] == 0x40005
+    encoder.configure(physical_layer_scrambler_shift_reg_init=7)
+    assert fake_access.DATA[0] == 0x40007
+
+
+def test_encoderInitDropsShadows(monkeypatch):
+    monkeypatch.setattr(fake_access, "DATA", {})
+    encoder = DvbEncoder(0, 16 * 1024)
+    encoder.configure(enable_dummy_frames=1)
+    encoder.output.configure(block_data=1)
+    # Simulates the FPGA being reset behind the encoder's back
+    fake_access.DATA.clear()
+    encoder.init()
+    encoder.configure(physical_layer_scrambler_shift_reg_init=7)
+    encoder.output.configure(allow_word=1)
+    assert fake_access.DATA[0] == 7
+    assert fake_access.DATA[0x1300] == 0x2
+
+
+def test_axiDebugSettersOnlyWrite():
+    regs = _Registers()
+    regs.regs = {0xD00: 0}
+    waypoint = AxiDebug(regs, 0xD00)
+    waypoint.block_data = 1
+    waypoint.allow_word = 1
+    waypoint.allow_frame = 1
+    waypoint.block_data = 0
+    assert regs.reads == [0xD00]
+    assert regs.writes == [(0xD00, 0x1), (0xD00, 0x3), (0xD00, 0x7), (0xD00, 0x6)]
@@ -0,0 +1,75 @@
+# pylint: disable=missing-docstring
+
+import numpy as np
+import pytest
+
+from dvb.axi_fifo import _swapWords, _unswapWords  # type: ignore
+from dvb.run import _swapHalfWords
+
+LENGTHS = range(8)
+
+
+def _data(length: int) -> bytes:
+    return bytes(range(1, length + 1))
+
+
+def _swapHalfWordsReference(data: bytes) -> bytes:
+    "Swaps the 16-bit halves of every 4 byte chunk with plain slicing"
+    return b"".join(
+        data[i + 2 : i + 4] + data[i : i + 2] for i in range(0, len(data), 4)
+    )
+
+
+def _swapHalfWordsCopy(data: bytes) -> bytes:
+    buffer = bytearray(data)
+    with memoryview(buffer) as view:
+        _swapHalfWords(view)
+    return bytes(buffer)
+
+
+@pytest.mark.parametrize("length", LENGTHS)
+def test_swapHalfWords(length):
+    data = _data(length)
+    assert _swapHalfWordsCopy(data) == _swapHalfWordsReference(data)
+
+
+@pytest.mark.parametrize("length", LENGTHS)
+def test_swapHalfWordsRoundTrip(length):
+    data = _data(length)
+    swapped_twice = _swapHalfWordsCopy(_swapHalfWordsCopy(data))
+    if length % 4 == 3:
+        # A 3 byte tail becomes tail[2] + tail[0:2], which isn't its own inverse
+        tail = data[-3:]
+        assert swapped_twice == data[:-3] + tail[1:2] + tail[2:3] + tail[0:1]
+    else:
+        assert swapped_twice == data
+
+
+@pytest.mark.parametrize("length", LENGTHS)
+def test_swapWords(length):
+    data = _data(length)
+    # Same as pushing each word as int.from_bytes(word, "big")
+    expected = b"".join(
+        int.from_bytes(data[i : i + 4], "big").to_bytes(4, "little")
+        for i in range(0, len(data), 4)
+    )
+    assert _swapWords(data) == expected
+
+
+@pytest.mark.parametrize("length", LENGTHS)
+def test_swapWordsRoundTrip(length):
+    data = _data(length)
+    # The tail is zero padded on its MSB side, which comes first once swapped
+    tail = length % 4
+    padded = data[: length - tail] + (bytes(4 - tail) + data[-tail:] if tail else b"")
+    assert _swapWords(_swapWords(data)) == padded
+
+
+@pytest.mark.parametrize("length", LENGTHS)
+def test_unswapWords(length):
+    words = np.frombuffer(_swapWords(_data(length)), dtype="<u4")
+    expected = b""
+    for word in words:
+        text = f"{word:08X}"
+        expected += bytes.fromhex(text[2:4] + text[0:2] + text[6:8] + text[4:6])
+    assert _unswapWords(words) == expected